@@ -7,7 +7,13 @@ import numpy as np
 from pandas import DataFrame
 from sklearn.preprocessing import LabelEncoder
 from torch import Tensor
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import (
+    Dataset,
+    DataLoader,
+    BatchSampler,
+    RandomSampler,
+    SequentialSampler,
+)
 
 from rllm.types import ColType, TaskType, StatType
 from rllm.data.storage import BaseStorage
@@ -317,13 +323,40 @@ class TableData(BaseTable):
         test_split: int | float,
         batch_size: int,
         shuffle: bool = False,
-    ) -> Tuple[TableDataset, TableDataset, TableDataset]:
-        train_dataset, val_dataset, test_dataset = self.get_dataset(
-            train_split, val_split, test_split
-        )
-        train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=shuffle)
-        val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=shuffle)
-        test_loader = DataLoader(test_dataset, batch_size=batch_size, shuffle=shuffle)
+        **kwargs,
+    ) -> Tuple[DataLoader, DataLoader, DataLoader]:
+        r"""Split the table and wrap each split in a
+        :class:`torch.utils.data.DataLoader`. Each batch is built by indexing
+        the split once with all of its row indices, so the loader yields
+        already batched :obj:`(feat_dict, y)` pairs and a custom
+        :obj:`collate_fn` receives a whole batch rather than a list of rows.
+
+        Additional :obj:`**kwargs` (e.g., :obj:`pin_memory=True`,
+        :obj:`num_workers`) are passed to every loader, which lets
+        CPU-resident tables overlap host-to-device copies with compute.
+        :obj:`drop_last` and :obj:`generator` are applied to the batch
+        sampler. :obj:`sampler`, :obj:`batch_sampler` and :obj:`batch_size`
+        are reserved and must not be passed."""
+        drop_last = kwargs.pop("drop_last", False)
+        generator = kwargs.pop("generator", None)
+        loaders = []
+        for dataset in self.get_dataset(train_split, val_split, test_split):
+            if shuffle:
+                sampler = RandomSampler(dataset, generator=generator)
+            else:
+                sampler = SequentialSampler(dataset)
+            # Index each split once per batch, so every batch is a single
+            # gather from the (possibly device-resident) table rather than
+            # `batch_size` single rows collated on the host.
+            loaders.append(
+                DataLoader(
+                    dataset,
+                    sampler=BatchSampler(sampler, batch_size, drop_last),
+                    batch_size=None,
+                    **kwargs,
+                )
+            )
+        train_loader, val_loader, test_loader = loaders
         return train_loader, val_loader, test_loader
 
     # Get table tensor #########################################
@@ -11,9 +11,10 @@ from ._col_encoder import ColEncoder
 
 class LinearEncoder(ColEncoder):
     r"""A linear function based ColEncoder for numerical features. It applies
-    a linear transformation using :obj:`torch.einsum` on each raw numerical
-    feature and concatenates the output embeddings. Note that the
-    implementation does this for all numerical features in a batched manner.
+    a linear transformation on each raw numerical feature and concatenates
+    the output embeddings. Note that the implementation does this for all
+    numerical features in a batched manner, using a broadcast multiply-add
+    when :obj:`in_dim` is 1 and :obj:`torch.baddbmm` otherwise.
 
     Args:
         in_dim (int, optional): The input dimensionality
@@ -47,15 +48,26 @@ class LinearEncoder(ColEncoder):
 
     def post_init(self):
         r"""This is the actual initialization function."""
+        # [num_cols, 1] to broadcast over [batch_size, num_cols, in_dim]
         mean = torch.tensor([stats[StatType.MEAN] for stats in self.stats_list])
-        self.register_buffer("mean", mean)
+        self.register_buffer("mean", mean.unsqueeze(-1))
         std = torch.tensor([stats[StatType.STD] for stats in self.stats_list]) + 1e-6
-        self.register_buffer("std", std)
+        self.register_buffer("inv_std", 1.0 / std.unsqueeze(-1))
         num_cols = len(self.stats_list)
         self.weight = Parameter(torch.empty(num_cols, self.in_dim, self.out_dim))
         self.bias = Parameter(torch.empty(num_cols, self.out_dim))
         self.reset_parameters()
 
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # Convert checkpoints that stored a flat `mean` and `std` buffer
+        std = state_dict.pop(prefix + "std", None)
+        if std is not None:
+            state_dict[prefix + "inv_std"] = 1.0 / std.view(-1, 1)
+        mean = state_dict.get(prefix + "mean")
+        if mean is not None and mean.dim() == 1:
+            state_dict[prefix + "mean"] = mean.view(-1, 1)
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
     def reset_parameters(self) -> None:
         super().reset_parameters()
         torch.nn.init.normal_(self.weight, std=0.01)
@@ -65,19 +77,25 @@ class LinearEncoder(ColEncoder):
         self,
         feat: Tensor,
     ) -> Tensor:
-        if feat.ndim == 2:
-            # feat: [batch_size, num_cols]
-            feat = ((feat - self.mean) / self.std).unsqueeze(-1)
-        elif feat.ndim == 3:
-            # feat: [batch_size, num_cols, 1]
-            feat = (feat - self.mean.unsqueeze(-1)) / self.std.unsqueeze(-1)
-        # [batch_size, num_cols, in_dim], [num_cols, in_dim, out_dim]
-        # -> [batch_size, num_cols, out_dim]
-        scale = feat.size(-1)
-        x_lin = torch.einsum("ijk,jkl->ijl", feat, self.weight) / scale
-        # [batch_size, num_cols, out_dim] + [num_cols, out_dim]
-        # -> [batch_size, num_cols, out_dim]
-        x = x_lin + self.bias
+        # [batch_size, num_cols] or [batch_size, num_cols, in_dim]
+        # -> [batch_size, num_cols, in_dim] without branching on the rank
+        feat = feat.reshape(feat.size(0), feat.size(1), self.in_dim)
+        feat = (feat - self.mean) * self.inv_std
+        if self.in_dim == 1:
+            # [batch_size, num_cols, 1] * [num_cols, out_dim] + [num_cols, out_dim]
+            # -> [batch_size, num_cols, out_dim]. With a single input dim there
+            # is no reduction, so one broadcast multiply-add replaces the GEMM.
+            x = torch.addcmul(self.bias, feat, self.weight.squeeze(1))
+        else:
+            # [num_cols, batch_size, in_dim] @ [num_cols, in_dim, out_dim]
+            # -> [num_cols, batch_size, out_dim], with the 1 / in_dim scale and
+            # the bias add fused into a single batched GEMM.
+            bias = self.bias.unsqueeze(1).expand(-1, feat.size(0), -1)
+            x = torch.baddbmm(
+                bias, feat.transpose(0, 1), self.weight, alpha=1.0 / self.in_dim
+            )
+            # -> [batch_size, num_cols, out_dim]
+            x = x.transpose(0, 1).contiguous()
 
         if self.activation is not None:
             x = self.activation(x)
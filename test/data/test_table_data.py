@@ -27,3 +27,58 @@ def test_categorical_target_order():
         torch.tensor([[0], [1], [1], [1]]),
     )
     assert torch.equal(dataset.y, torch.tensor([0, 1, 1, 1]))
+
+
+def test_get_dataloader_kwargs():
+    df = pd.DataFrame({"cat_1": np.arange(10), "cat_2": np.arange(10)})
+    col_types = {"cat_1": ColType.CATEGORICAL, "cat_2": ColType.CATEGORICAL}
+    dataset = TableData(df, col_types, target_col="cat_2")
+    train_loader, val_loader, test_loader = dataset.get_dataloader(
+        train_split=0.8, val_split=0.1, test_split=0.1, batch_size=3, drop_last=True
+    )
+    assert len(train_loader) == 2
+    assert len(val_loader) == 0 and len(test_loader) == 0
+
+    # Loader options reach every split of a CPU-resident table
+    loaders = dataset.get_dataloader(
+        train_split=0.8,
+        val_split=0.1,
+        test_split=0.1,
+        batch_size=3,
+        pin_memory=True,
+        num_workers=1,
+        persistent_workers=True,
+    )
+    for loader in loaders:
+        assert loader.pin_memory is True
+        assert loader.num_workers == 1
+        assert loader.persistent_workers is True
+
+
+def test_get_dataloader():
+    df = pd.DataFrame({"cat_1": np.arange(10), "cat_2": np.arange(10)})
+    col_types = {"cat_1": ColType.CATEGORICAL, "cat_2": ColType.CATEGORICAL}
+    dataset = TableData(df, col_types, target_col="cat_2")
+    train_loader, _, _ = dataset.get_dataloader(
+        train_split=0.8, val_split=0.1, test_split=0.1, batch_size=3
+    )
+    feats, ys = zip(*train_loader)
+    assert [y.size(0) for y in ys] == [3, 3, 2]
+    feat = torch.cat([feat_dict[ColType.CATEGORICAL] for feat_dict in feats])
+    assert torch.equal(feat, dataset[ColType.CATEGORICAL][:8])
+    assert torch.equal(torch.cat(ys), dataset.y[:8])
+
+    # Shuffled batches cover every row exactly once
+    train_loader, _, _ = dataset.get_dataloader(
+        train_split=0.8,
+        val_split=0.1,
+        test_split=0.1,
+        batch_size=3,
+        shuffle=True,
+        generator=torch.Generator().manual_seed(0),
+    )
+    feats, ys = zip(*train_loader)
+    assert [y.size(0) for y in ys] == [3, 3, 2]
+    feat = torch.cat([feat_dict[ColType.CATEGORICAL] for feat_dict in feats])
+    assert torch.equal(feat.view(-1).sort().values, torch.arange(8, dtype=feat.dtype))
+    assert torch.equal(feat.view(-1).float(), torch.cat(ys).float())
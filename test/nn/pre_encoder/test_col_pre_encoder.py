@@ -15,7 +15,7 @@ import pandas as pd
 
 import torch
 
-from rllm.types import ColType
+from rllm.types import ColType, StatType
 from rllm.data.table_data import TableData
 from rllm.nn.pre_encoder._reshape_encoder import ReshapeEncoder
 from rllm.nn.pre_encoder._embedding_encoder import EmbeddingEncoder
@@ -111,13 +111,47 @@ def test_linear_encoder():
         stats_list=dataset.metadata[ColType.NUMERICAL],
     )
     pre_encoder.post_init()
+    # A non-zero bias, so a dropped or misplaced bias term is caught
+    with torch.no_grad():
+        torch.nn.init.normal_(pre_encoder.bias)
     x_num = dataset.get_feat_dict()[ColType.NUMERICAL].clone()
     x_emb = pre_encoder(x_num)
     assert x_emb.shape == (x_num.size(0), x_num.size(1), 4)
     assert torch.allclose(x_num, dataset.get_feat_dict()[ColType.NUMERICAL])
 
+    # Compare with normalizing each column and applying its own linear map
+    stats_list = dataset.metadata[ColType.NUMERICAL]
+    mean = torch.tensor([stats[StatType.MEAN] for stats in stats_list])
+    std = torch.tensor([stats[StatType.STD] for stats in stats_list]) + 1e-6
+    feat = ((x_num - mean) / std).unsqueeze(-1)
+    x_ref = feat * pre_encoder.weight.squeeze(1) + pre_encoder.bias
+    assert torch.allclose(x_emb, x_ref, atol=1e-6)
+
     # Perturb the first column
     x_num[:, 0] = x_num[:, 0] + 42.0
     x_perturbed = pre_encoder(x_num)
     # Make sure other column embeddings are unchanged
     assert (x_perturbed[:, 1:, :] == x_emb[:, 1:, :]).all()
+
+    # An empty batch yields an empty embedding
+    x_empty = pre_encoder(x_num[:0])
+    assert x_empty.shape == (0, x_num.size(1), 4)
+
+    # Inputs with in_dim > 1 are projected with a batched matrix multiply
+    pre_encoder = LinearEncoder(in_dim=2, out_dim=4, stats_list=stats_list)
+    pre_encoder.post_init()
+    # A non-zero bias, so a dropped or misplaced bias term is caught
+    with torch.no_grad():
+        torch.nn.init.normal_(pre_encoder.bias)
+    x_pair = torch.stack([x_num, 2 * x_num], dim=-1)
+    x_emb = pre_encoder(x_pair)
+    feat = (x_pair - mean.unsqueeze(-1)) / std.unsqueeze(-1)
+    x_ref = torch.einsum("ijk,jkl->ijl", feat, pre_encoder.weight) / 2
+    assert torch.allclose(x_emb, x_ref + pre_encoder.bias, atol=1e-6)
+
+    # Checkpoints with a flat `mean` and a `std` buffer still load
+    state_dict = pre_encoder.state_dict()
+    state_dict["mean"] = state_dict["mean"].view(-1)
+    state_dict["std"] = 1.0 / state_dict.pop("inv_std").view(-1)
+    pre_encoder.load_state_dict(state_dict)
+    assert torch.allclose(pre_encoder(x_pair), x_emb)